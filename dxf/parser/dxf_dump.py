@@ -10,42 +10,182 @@ dxf_dump.py — 解析 DXF，导出基础结构为 JSON，便于后续分析
 - 不做识别，只导出“原始事实”：图层、块定义、块引用(INSERT)、多段线(LWPOLYLINE/POLYLINE)、
   直线、圆弧、圆、文字(TEXT/MTEXT)、标注(DIMENSION) 等。
 - --limit 控制每类实体最多导出条数（0 表示不限制，慎用大图）。
+- 标注默认调用 DIMENSION.render()，它会按标注样式重算并改写 defpoint，导出的是改写后的值；
+  --no-render-dims 跳过 render()（大图上最慢的一步），defpoint 为文件中原样存储的值。
+- 标注的 measurement 为图上显示的测量值（已乘 DIMLFAC，角度标注为度），与是否 render 无关。
+- 解析结果会缓存到 <outdir>/.cache（每个 DXF 路径一个文件，文件修改后覆盖），重复运行跳过解析；--no-cache 关闭。
+- 缓存是 pickle，运行时会从 outdir 加载：只对可信的 outdir 使用缓存。
 """
 
 from __future__ import annotations
 import argparse
+import hashlib
 import json
 import os
+import pickle
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from operator import attrgetter
 from typing import Any
 
 import ezdxf
+import numpy as np
+
+try:  # orjson 为 C 实现，序列化大列表（如多段线点集）比标准库 json 快得多
+    import orjson
+except ImportError:  # 未安装时退回标准库
+    orjson = None  # type: ignore[assignment]
 
 
 # ------------------------ 工具函数 ------------------------
-def as_float(x):
+# ezdxf 的 Vec3 属性本身就是 float，attrgetter 一次取出 (x, y, z) 元组
+_get_xyz = attrgetter("x", "y", "z")
+_get_scale = attrgetter("xscale", "yscale", "zscale")
+
+
+def as_float(x: Any) -> float | None:
     try:
         return float(x)
     except Exception:
         return None
 
 
-def vec_to_list(v):
-    """把 DXF 的 Vec2/Vec3 转成 Python list，便于 JSON 序列化。"""
+def float_or_nan(x: Any) -> float:
+    """as_float 的数组版：无法转换时返回 NaN，便于写入 float64 列。"""
+    v = as_float(x)
+    return np.nan if v is None else v
+
+
+def vec_to_list(v: Any) -> list[float | None] | None:
+    """把 DXF 的 Vec2/Vec3 转成 Python list（元素均为 float），便于 JSON 序列化。"""
     try:
-        seq = list(v)
+        seq = tuple(v)
         return [as_float(t) for t in seq]
     except Exception:
         return None
 
 
+def _dumps(data: Any, indent: bool = True) -> bytes:
+    """序列化为 UTF-8 bytes：优先 orjson（等价 ensure_ascii=False），未安装时退回标准库 json。"""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS 兼容 attribs 中 tag 为 None 等非字符串键
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+# 输出文件的写缓冲；输出目录由 main() 统一创建一次
+WRITE_BUFFER_SIZE = 1 << 20
+
+
 def write_json(path: str, data: Any):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(_dumps(data) + b"\n")
+
+
+class JSONArrayWriter:
+    """流式写 JSON 数组：每个元素单独序列化后立即写盘，不在内存中攒整张列表。
+
+    用法：
+        with JSONArrayWriter(path) as w:
+            for item in items:
+                w.write(item)
+
+    with 块内抛出异常时删除已写出的部分文件。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f: Any = None
+        self._count = 0
+
+    def __enter__(self):
+        self._f = open(self.path, "wb", buffering=WRITE_BUFFER_SIZE)
+        self._f.write(b"[")
+        return self
+
+    def write(self, obj: Any):
+        self._f.write(b",\n  " if self._count else b"\n  ")
+        self._f.write(_dumps(obj, indent=False))
+        self._count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # 写入中途出错：不补结尾的 "]"，直接删除半截文件，避免留下看似完整的 JSON
+            self._f.close()
+            os.remove(self.path)
+            return False
+        try:
+            self._f.write(b"\n]\n" if self._count else b"]\n")
+        finally:
+            self._f.close()
+        return False
+
+
+def _py_value(v):
+    """ndarray 的一行/一个元素转为 Python 值；NaN 记为 None（与 as_float 失败时一致）。"""
+    v = v.tolist()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+def write_columns(path: str, columns: dict[str, Any]):
+    """把按列保存的数据（list 或 ndarray，长度相同）流式写成按行的 JSON 数组。
+
+    行 dict 只在序列化时逐个临时构造，内存中常驻的是紧凑的 float64 列。
+    """
+    names = list(columns)
+    cols = [map(_py_value, c) if isinstance(c, np.ndarray) else c for c in columns.values()]
+    with JSONArrayWriter(path) as w:
+        for vals in zip(*cols):
+            w.write(dict(zip(names, vals)))
+
+
+def load_doc_cached(path: str, outdir: str):
+    """读取 DXF；解析结果以 pickle 缓存到 outdir/.cache，文件未变时直接加载，跳过耗时的解析。
+
+    缓存文件名只由 DXF 的绝对路径决定，同一文件始终只有一份缓存；文件内先存
+    (mtime_ns, size, ezdxf 版本) 戳，再存 doc，戳不一致时不加载 doc，重新解析并覆盖。
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size, ezdxf.__version__)
+    key = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = os.path.join(outdir, ".cache", f"{key}.pkl")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                if pickle.load(f) == stamp:
+                    return pickle.load(f)
+        except Exception:
+            pass  # 缓存损坏或不兼容：重新解析
+
+    doc = ezdxf.readfile(path)
+    try:
+        buf = pickle.dumps(doc, protocol=5)
+    except Exception as e:
+        print(f"[warn] DXF 解析结果无法缓存，已跳过：{e}")
+        return doc
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(stamp, f, protocol=5)
+            f.write(buf)
+        os.replace(tmp_path, cache_path)  # 原子替换旧缓存，中途失败不会留下半个缓存文件
+    except OSError as e:
+        # 磁盘满、.cache 不可写等：解析已成功，只是不缓存
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        print(f"[warn] DXF 解析结果缓存写入失败，已跳过：{e}")
+    return doc
 
 
-def get_flag(obj, attr: str):
+def get_flag(obj: Any, attr: str) -> bool | None:
     """兼容属性/方法两种写法，统一返回 bool 或 None。"""
     v = getattr(obj, attr, None)
     if v is None:
@@ -62,7 +202,7 @@ def get_flag(obj, attr: str):
 
 
 # ------------------------ 各类导出 ------------------------
-def dump_meta(doc, outdir: str):
+def dump_meta(doc, outdir: str, entity_count: int):
     """只使用跨版本更稳的字段。"""
     try:
         dxfversion = str(getattr(doc, "dxfversion", ""))
@@ -79,7 +219,7 @@ def dump_meta(doc, outdir: str):
             "max_$LIMMAX": vec_to_list(doc.header.get("$LIMMAX")),
         },
         "layouts": [layout.name for layout in doc.layouts],
-        "modelspace_entity_count": sum(1 for _ in doc.modelspace()),
+        "modelspace_entity_count": entity_count,
     }
     write_json(os.path.join(outdir, "00_meta.json"), meta)
 
@@ -107,7 +247,7 @@ def dump_layers(doc, outdir: str):
 def dump_blocks(doc, outdir: str, limit: int | None):
     blocks = []
     for blk in doc.blocks:
-        type_count = defaultdict(int)
+        type_count: defaultdict[str, int] = defaultdict(int)
         for e in blk:
             try:
                 type_count[e.dxftype()] += 1
@@ -128,9 +268,41 @@ def dump_blocks(doc, outdir: str, limit: int | None):
     write_json(os.path.join(outdir, "02_blocks_definitions.json"), blocks)
 
 
-def dump_inserts(msp, outdir: str, limit: int | None):
-    data = []
-    for e in msp.query("INSERT"):
+# 需要从 modelspace 导出的实体类型
+ENTITY_TYPES = ("INSERT", "LWPOLYLINE", "POLYLINE", "LINE", "ARC", "CIRCLE", "TEXT", "MTEXT", "DIMENSION")
+
+
+def collect_entities(msp, limit: int | None) -> tuple[dict[str, list], int]:
+    """单次遍历 modelspace，按 dxftype 分桶（每桶最多 limit 个），替代多次 msp.query() 全量扫描。
+
+    返回 (分桶结果, modelspace 实体总数)；总数在同一次遍历中顺带统计。
+    """
+    buckets: dict[str, list] = {t: [] for t in ENTITY_TYPES}
+    pending = len(buckets)  # 尚未装满的桶数；全部装满后只计数，不再分派
+    total = 0
+    it = iter(msp)
+    for e in it:
+        total += 1
+        bucket = buckets.get(e.dxftype())
+        if bucket is None or (limit and len(bucket) >= limit):
+            continue
+        bucket.append(e)
+        if limit and len(bucket) >= limit:
+            pending -= 1
+            if not pending:
+                total += sum(1 for _ in it)
+                break
+    return buckets, total
+
+
+def dump_inserts(entities: list, outdir: str):
+    n = len(entities)
+    block_names, layers = [None] * n, [None] * n
+    attribs: list[dict | None] = [None] * n
+    inserts = np.empty((n, 3))
+    rotations = np.empty(n)
+    scales = np.empty((n, 3))
+    for i, e in enumerate(entities):
         atts = {}
         try:
             for a in e.attribs():
@@ -138,187 +310,195 @@ def dump_inserts(msp, outdir: str, limit: int | None):
         except Exception:
             pass
         dxf = e.dxf
-        insert = [as_float(getattr(dxf.insert, "x", None)),
-                  as_float(getattr(dxf.insert, "y", None)),
-                  as_float(getattr(dxf.insert, "z", None))]
-        scale = [as_float(getattr(dxf, "xscale", None)),
-                 as_float(getattr(dxf, "yscale", None)),
-                 as_float(getattr(dxf, "zscale", None))]
-        data.append({
-            "block_name": getattr(dxf, "name", None),
-            "layer": getattr(dxf, "layer", None),
-            "insert": insert,
-            "rotation_deg": as_float(getattr(dxf, "rotation", None)),
-            "scale": scale,
-            "attribs": atts,
-        })
-        if limit and len(data) >= limit:
-            break
-    write_json(os.path.join(outdir, "10_inserts_blocks.json"), data)
-
-
-def dump_lwpolylines(msp, outdir: str, limit: int | None):
-    data = []
-    for e in msp.query("LWPOLYLINE"):
-        pts = []
-        try:
-            # get_points() 返回 (x, y, [start_width, end_width, bulge])
-            for p in e.get_points():
-                if isinstance(p, (list, tuple)) and len(p) >= 2:
-                    pts.append([as_float(p[0]), as_float(p[1])])
-        except Exception:
-            pass
-        data.append({
-            "layer": getattr(e.dxf, "layer", None),
-            "closed": bool(getattr(e, "closed", False)),
-            "points_xy": pts,
-        })
-        if limit and len(data) >= limit:
-            break
-    write_json(os.path.join(outdir, "11_lwpolylines.json"), data)
-
-
-def dump_polylines(msp, outdir: str, limit: int | None):
-    data = []
-    for e in msp.query("POLYLINE"):
-        pts = []
-        try:
-            for v in e.vertices:
-                loc = getattr(v.dxf, "location", None)
-                if loc is not None:
-                    pts.append([as_float(getattr(loc, "x", None)),
-                                as_float(getattr(loc, "y", None)),
-                                as_float(getattr(loc, "z", None))])
-        except Exception:
-            pass
-        closed = None
-        try:
-            closed = bool(getattr(e, "is_closed", None))
-        except Exception:
-            pass
-        data.append({
-            "layer": getattr(e.dxf, "layer", None),
-            "closed": closed,
-            "points_xyz": pts,
-        })
-        if limit and len(data) >= limit:
-            break
-    write_json(os.path.join(outdir, "12_polylines.json"), data)
-
-
-def dump_lines(msp, outdir: str, limit: int | None):
-    data = []
-    for e in msp.query("LINE"):
-        dxf = e.dxf
-        start = [as_float(getattr(dxf.start, "x", None)),
-                 as_float(getattr(dxf.start, "y", None)),
-                 as_float(getattr(dxf.start, "z", None))]
-        end = [as_float(getattr(dxf.end, "x", None)),
-               as_float(getattr(dxf.end, "y", None)),
-               as_float(getattr(dxf.end, "z", None))]
-        data.append({
-            "layer": getattr(dxf, "layer", None),
-            "start": start,
-            "end": end,
-        })
-        if limit and len(data) >= limit:
-            break
-    write_json(os.path.join(outdir, "13_lines.json"), data)
-
-
-def dump_arcs_circles(msp, outdir: str, limit: int | None):
-    arcs = []
-    for e in msp.query("ARC"):
+        block_names[i] = getattr(dxf, "name", None)
+        layers[i] = getattr(dxf, "layer", None)
+        inserts[i] = _get_xyz(dxf.insert)
+        rotations[i] = float_or_nan(getattr(dxf, "rotation", None))
+        scales[i] = _get_scale(dxf)
+        attribs[i] = atts
+    write_columns(os.path.join(outdir, "10_inserts_blocks.json"), {
+        "block_name": block_names,
+        "layer": layers,
+        "insert": inserts,
+        "rotation_deg": rotations,
+        "scale": scales,
+        "attribs": attribs,
+    })
+
+
+def dump_lwpolylines(entities: list, outdir: str):
+    with JSONArrayWriter(os.path.join(outdir, "11_lwpolylines.json")) as w:
+        for e in entities:
+            pts = []
+            try:
+                # get_points('xy') 只取坐标；整条多段线一次性拷贝进 ndarray，再一次 tolist()
+                pts = np.asarray(list(e.get_points("xy")), dtype=np.float64).reshape(-1, 2).tolist()
+            except Exception:
+                pass
+            w.write({
+                "layer": getattr(e.dxf, "layer", None),
+                "closed": bool(getattr(e, "closed", False)),
+                "points_xy": pts,
+            })
+
+
+def dump_polylines(entities: list, outdir: str):
+    with JSONArrayWriter(os.path.join(outdir, "12_polylines.json")) as w:
+        for e in entities:
+            pts = []
+            try:
+                locs = [v.dxf.location.xyz for v in e.vertices]
+                pts = np.asarray(locs, dtype=np.float64).reshape(-1, 3).tolist()
+            except Exception:
+                pass
+            closed = None
+            try:
+                closed = bool(getattr(e, "is_closed", None))
+            except Exception:
+                pass
+            w.write({
+                "layer": getattr(e.dxf, "layer", None),
+                "closed": closed,
+                "points_xyz": pts,
+            })
+
+
+def dump_lines(entities: list, outdir: str):
+    n = len(entities)
+    layers = [None] * n
+    starts = np.empty((n, 3))
+    ends = np.empty((n, 3))
+    for i, e in enumerate(entities):
         dxf = e.dxf
-        center = [as_float(getattr(dxf.center, "x", None)),
-                  as_float(getattr(dxf.center, "y", None)),
-                  as_float(getattr(dxf.center, "z", None))]
-        arcs.append({
-            "layer": getattr(dxf, "layer", None),
-            "center": center,
-            "radius": as_float(getattr(dxf, "radius", None)),
-            "start_angle_deg": as_float(getattr(dxf, "start_angle", None)),
-            "end_angle_deg": as_float(getattr(dxf, "end_angle", None)),
-        })
-        if limit and len(arcs) >= limit:
-            break
-    write_json(os.path.join(outdir, "14_arcs.json"), arcs)
-
-    circles = []
-    for e in msp.query("CIRCLE"):
+        layers[i] = getattr(dxf, "layer", None)
+        starts[i] = _get_xyz(dxf.start)
+        ends[i] = _get_xyz(dxf.end)
+    write_columns(os.path.join(outdir, "13_lines.json"), {
+        "layer": layers,
+        "start": starts,
+        "end": ends,
+    })
+
+
+def dump_arcs_circles(arc_entities: list, circle_entities: list, outdir: str):
+    n = len(arc_entities)
+    layers = [None] * n
+    centers = np.empty((n, 3))
+    radii, start_angles, end_angles = np.empty(n), np.empty(n), np.empty(n)
+    for i, e in enumerate(arc_entities):
         dxf = e.dxf
-        center = [as_float(getattr(dxf.center, "x", None)),
-                  as_float(getattr(dxf.center, "y", None)),
-                  as_float(getattr(dxf.center, "z", None))]
-        circles.append({
-            "layer": getattr(dxf, "layer", None),
-            "center": center,
-            "radius": as_float(getattr(dxf, "radius", None)),
-        })
-        if limit and len(circles) >= limit:
-            break
-    write_json(os.path.join(outdir, "15_circles.json"), circles)
-
-
-def dump_texts(msp, outdir: str, limit: int | None):
-    texts = []
-    for e in msp.query("TEXT"):
+        layers[i] = getattr(dxf, "layer", None)
+        centers[i] = _get_xyz(dxf.center)
+        radii[i] = float_or_nan(getattr(dxf, "radius", None))
+        start_angles[i] = float_or_nan(getattr(dxf, "start_angle", None))
+        end_angles[i] = float_or_nan(getattr(dxf, "end_angle", None))
+    write_columns(os.path.join(outdir, "14_arcs.json"), {
+        "layer": layers,
+        "center": centers,
+        "radius": radii,
+        "start_angle_deg": start_angles,
+        "end_angle_deg": end_angles,
+    })
+
+    n = len(circle_entities)
+    layers = [None] * n
+    centers = np.empty((n, 3))
+    radii = np.empty(n)
+    for i, e in enumerate(circle_entities):
         dxf = e.dxf
-        insert = [as_float(getattr(dxf.insert, "x", None)),
-                  as_float(getattr(dxf.insert, "y", None)),
-                  as_float(getattr(dxf.insert, "z", None))]
-        texts.append({
-            "layer": getattr(dxf, "layer", None),
-            "text": getattr(dxf, "text", None),
-            "insert": insert,
-            "height": as_float(getattr(dxf, "height", None)),
-            "rotation_deg": as_float(getattr(dxf, "rotation", None)),
-        })
-        if limit and len(texts) >= limit:
-            break
-
-    mtexts = []
-    for e in msp.query("MTEXT"):
+        layers[i] = getattr(dxf, "layer", None)
+        centers[i] = _get_xyz(dxf.center)
+        radii[i] = float_or_nan(getattr(dxf, "radius", None))
+    write_columns(os.path.join(outdir, "15_circles.json"), {
+        "layer": layers,
+        "center": centers,
+        "radius": radii,
+    })
+
+
+def dump_texts(text_entities: list, mtext_entities: list, outdir: str):
+    n = len(text_entities)
+    layers, texts = [None] * n, [None] * n
+    inserts = np.empty((n, 3))
+    heights, rotations = np.empty(n), np.empty(n)
+    for i, e in enumerate(text_entities):
         dxf = e.dxf
-        insert = [as_float(getattr(dxf.insert, "x", None)),
-                  as_float(getattr(dxf.insert, "y", None)),
-                  as_float(getattr(dxf.insert, "z", None))]
-        mtexts.append({
-            "layer": getattr(dxf, "layer", None),
-            "text": getattr(e, "text", None),
-            "insert": insert,
-            "char_height": as_float(getattr(dxf, "char_height", None)),
-            "rotation_deg": as_float(getattr(dxf, "rotation", None)),
-            "width": as_float(getattr(dxf, "width", None)),
-        })
-        if limit and len(mtexts) >= limit:
-            break
-
-    write_json(os.path.join(outdir, "16_texts.json"), texts)
-    write_json(os.path.join(outdir, "17_mtexts.json"), mtexts)
-
-
-def dump_dimensions(msp, outdir: str, limit: int | None):
-    data = []
-    for e in msp.query("DIMENSION"):
-        try:
-            e.render()  # 让 ezdxf 计算 measurement（部分版本可能抛异常，忽略即可）
-        except Exception:
-            pass
+        layers[i] = getattr(dxf, "layer", None)
+        texts[i] = getattr(dxf, "text", None)
+        inserts[i] = _get_xyz(dxf.insert)
+        heights[i] = float_or_nan(getattr(dxf, "height", None))
+        rotations[i] = float_or_nan(getattr(dxf, "rotation", None))
+    write_columns(os.path.join(outdir, "16_texts.json"), {
+        "layer": layers,
+        "text": texts,
+        "insert": inserts,
+        "height": heights,
+        "rotation_deg": rotations,
+    })
+
+    n = len(mtext_entities)
+    layers, texts = [None] * n, [None] * n
+    inserts = np.empty((n, 3))
+    char_heights, rotations, widths = np.empty(n), np.empty(n), np.empty(n)
+    for i, e in enumerate(mtext_entities):
         dxf = e.dxf
-        defpt = getattr(dxf, "defpoint", None)
-        data.append({
-            "layer": getattr(dxf, "layer", None),
-            "dimtype": getattr(e, "dimtype", None),
-            "text": getattr(dxf, "text", None),
-            "measurement": getattr(e, "measurement", None),
-            "defpoint": [as_float(getattr(defpt, "x", None)),
-                         as_float(getattr(defpt, "y", None)),
-                         as_float(getattr(defpt, "z", None))] if defpt is not None else None,
-        })
-        if limit and len(data) >= limit:
-            break
-    write_json(os.path.join(outdir, "18_dimensions.json"), data)
+        layers[i] = getattr(dxf, "layer", None)
+        texts[i] = getattr(e, "text", None)
+        inserts[i] = _get_xyz(dxf.insert)
+        char_heights[i] = float_or_nan(getattr(dxf, "char_height", None))
+        rotations[i] = float_or_nan(getattr(dxf, "rotation", None))
+        widths[i] = float_or_nan(getattr(dxf, "width", None))
+    write_columns(os.path.join(outdir, "17_mtexts.json"), {
+        "layer": layers,
+        "text": texts,
+        "insert": inserts,
+        "char_height": char_heights,
+        "rotation_deg": rotations,
+        "width": widths,
+    })
+
+
+_ANGULAR_DIMTYPES = (2, 5)  # 两线角度标注、三点角度标注：测量值为角度，不乘 DIMLFAC
+
+
+def dim_measurement(e: Any) -> float | list[float | None] | None:
+    """标注在图上显示的测量值。
+
+    优先取文件中存储的 actual_measurement（已含 DIMLFAC 线性比例）；缺失时用
+    get_measurement() 按定义点计算，非角度标注再乘标注样式的 dimlfac。
+    坐标标注的计算值为向量，输出 [x, y, z]。
+    """
+    meas = as_float(e.dxf.get("actual_measurement"))
+    if meas is not None:
+        return meas
+    try:
+        raw = e.get_measurement()
+        if e.dimtype not in _ANGULAR_DIMTYPES:
+            raw = raw * (as_float(e.override().get("dimlfac", 1.0)) or 1.0)
+    except Exception:
+        return None  # 未知标注类型或定义点缺失
+    return as_float(raw) if isinstance(raw, (int, float)) else vec_to_list(raw)
+
+
+def dump_dimensions(entities: list, outdir: str, render: bool = True):
+    """render=True 时调用 e.render()（与原实现一致，会改写 defpoint）；False 时 defpoint 为文件原值。"""
+    with JSONArrayWriter(os.path.join(outdir, "18_dimensions.json")) as w:
+        for e in entities:
+            meas = dim_measurement(e)
+            if render:
+                try:
+                    e.render()  # 按标注样式重算几何并改写 defpoint（部分版本可能抛异常，忽略即可）
+                except Exception:
+                    pass
+            dxf = e.dxf
+            defpt = getattr(dxf, "defpoint", None)
+            w.write({
+                "layer": getattr(dxf, "layer", None),
+                "dimtype": getattr(e, "dimtype", None),
+                "text": getattr(dxf, "text", None),
+                "measurement": meas,
+                "defpoint": list(_get_xyz(defpt)) if defpt is not None else None,
+            })
 
 
 # ------------------------ CLI ------------------------
@@ -327,6 +507,9 @@ def parse_args():
     ap.add_argument("dxf", help="DXF 文件路径（DWG 请先转为 DXF，如 2010 ASCII DXF）")
     ap.add_argument("--outdir", default="dxf_dump", help="输出目录")
     ap.add_argument("--limit", type=int, default=5000, help="每类实体最多导出条数；0 表示不限制")
+    ap.add_argument("--no-cache", action="store_true", help="不使用/不写入解析结果缓存")
+    ap.add_argument("--no-render-dims", action="store_true",
+                    help="不调用 DIMENSION.render()（大图上显著加速；defpoint 改为文件中存储的原值）")
     return ap.parse_args()
 
 
@@ -334,21 +517,32 @@ def main():
     args = parse_args()
 
     # 读取 DXF
-    doc = ezdxf.readfile(args.dxf)
-    msp = doc.modelspace()
     outdir = args.outdir
+    os.makedirs(outdir, exist_ok=True)
+    doc = ezdxf.readfile(args.dxf) if args.no_cache else load_doc_cached(args.dxf, outdir)
+    msp = doc.modelspace()
     limit = None if args.limit == 0 else int(args.limit)
 
-    dump_meta(doc, outdir)
+    ents, entity_count = collect_entities(msp, limit)
+    dump_meta(doc, outdir, entity_count)
     dump_layers(doc, outdir)
     dump_blocks(doc, outdir, limit)
-    dump_inserts(msp, outdir, limit)
-    dump_lwpolylines(msp, outdir, limit)
-    dump_polylines(msp, outdir, limit)
-    dump_lines(msp, outdir, limit)
-    dump_arcs_circles(msp, outdir, limit)
-    dump_texts(msp, outdir, limit)
-    dump_dimensions(msp, outdir, limit)
+
+    # 各类实体的导出互不依赖，用线程池并发（orjson 编码与文件写入期间会释放 GIL）；
+    # doc 只读共享。上面的块定义导出需先完成，因为 DIMENSION.render() 会新增匿名块。
+    tasks = [
+        (dump_inserts, ents["INSERT"]),
+        (dump_lwpolylines, ents["LWPOLYLINE"]),
+        (dump_polylines, ents["POLYLINE"]),
+        (dump_lines, ents["LINE"]),
+        (dump_arcs_circles, ents["ARC"], ents["CIRCLE"]),
+        (dump_texts, ents["TEXT"], ents["MTEXT"]),
+        (partial(dump_dimensions, render=not args.no_render_dims), ents["DIMENSION"]),
+    ]
+    with ThreadPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(fn, *fn_args, outdir) for fn, *fn_args in tasks]
+        for fut in as_completed(futures):
+            fut.result()  # 任一导出出错时在此抛出
 
     print(f"DXF parsed. JSON files saved to: {os.path.abspath(outdir)}")
 
@@ -0,0 +1,5 @@
+#!/usr/bin/env sh
+# 运行 dxf_dump：已用 setup.py 编译过时加载 mypyc 编译版，否则加载纯 Python 版
+# 用法：sh run.sh your.dxf --outdir ./dxf_dump --limit 0
+DIR="$(cd "$(dirname "$0")" && pwd)"
+PYTHONPATH="$DIR${PYTHONPATH:+:$PYTHONPATH}" exec python -c "from dxf_dump import main; main()" "$@"
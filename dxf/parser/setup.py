@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+可选：用 mypyc 把 dxf_dump.py 编译为 C 扩展，降低逐实体遍历中的函数调用开销。
+
+  pip install mypy          # 提供 mypyc
+  python setup.py build_ext --inplace
+
+编译产物（dxf_dump.*.so / .pyd）与 dxf_dump.py 在同一目录时，`import dxf_dump` 会优先加载它；
+删除产物即回到纯 Python 版本。`python dxf_dump.py` 运行的始终是源码，使用编译版请用 run.sh。
+"""
+from setuptools import setup
+from mypyc.build import mypycify
+
+setup(
+    name="dxf_dump",
+    py_modules=["dxf_dump"],
+    ext_modules=mypycify(["dxf_dump.py"]),
+)
@@ -4,30 +4,31 @@ import time
 import re
 import csv
 import io
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from flask import Flask, jsonify, request, render_template, Response
 import cloudpss
 
 app = Flask(__name__)
 
-# ---------- 工具函数：表结构转行 ----------
-def table_to_rows(table_obj):
-    columns = table_obj["data"]["columns"]
-    headers = [c["name"] for c in columns]
-    n = len(columns[0]["data"]) if columns else 0
-    rows = []
-    for i in range(n):
-        row = {}
-        for h, c in zip(headers, columns):
-            vals = c.get("data", [])
-            row[h] = vals[i] if i < len(vals) else None
-        rows.append(row)
-    return headers, rows
+# ---------- 鉴权 + 平台地址：启动时设置一次，不放在请求路径上 ----------
+API_TOKEN = os.getenv("CLOUDPSS_TOKEN")
+if not API_TOKEN:
+    raise RuntimeError("CLOUDPSS_TOKEN 未设置")
+cloudpss.setToken(API_TOKEN)
+os.environ["CLOUDPSS_API_URL"] = os.getenv("CLOUDPSS_API_URL", "https://cloudpss.net/")
 
+# ---------- 工具函数：列名清洗 + 表结构转行 ----------
 # HTML 标签清洗（列名里常见 <i>V</i><sub>m</sub>/pu 这类）
+# 列名在多次请求间反复出现，结果缓存；不含 "<"/"_" 的列名无需清洗，直接返回
 _tag_re = re.compile(r"<[^>]+>")
+@lru_cache(maxsize=4096)
 def clean_label(label: str) -> str:
     if not isinstance(label, str):
         return label
+    if "<" not in label and "_" not in label:
+        return label
     return _tag_re.sub("", label).replace("_", "")
 
 # 列名别名（更友好显示）
@@ -50,50 +51,83 @@ ALIASES = {
     "<i>Q</i><sub>loss</sub> / MVar": "Qloss(MVar)",
 }
 
-def convert_and_alias(table_list):
+def tables_to_aliased(table_list):
+    """
+    CloudPSS 表按列存储：table["data"]["columns"] = [{name, type, data}, ...]
+    一次转成按行、以别名为键的 {"headers": [...], "rows": [{alias: value, ...}, ...]}。
+    """
     if not table_list:
         return {"headers": [], "rows": []}
-    headers, rows = table_to_rows(table_list[0])
-    alias_headers = [ALIASES.get(h, clean_label(h)) for h in headers]
-    aliased_rows = []
-    for r in rows:
-        new_r = {}
-        for h, ah in zip(headers, alias_headers):
-            new_r[ah] = r.get(h, "")
-        aliased_rows.append(new_r)
-    return {"headers": alias_headers, "rows": aliased_rows}
+    columns = table_list[0]["data"]["columns"]
+    alias_headers = [ALIASES.get(c["name"]) or clean_label(c["name"]) for c in columns]
+    cols = [c.get("data", []) for c in columns]
+    if len({len(d) for d in cols}) > 1:
+        raise ValueError("结果表各列长度不一致：" + ", ".join(f"{h}={len(d)}" for h, d in zip(alias_headers, cols)))
+    rows = [dict(zip(alias_headers, vals)) for vals in zip(*cols)]
+    return {"headers": alias_headers, "rows": rows}
 
 def run_pf_and_get_tables(rid: str):
-    # 1) 鉴权 + 平台地址
-    api_token = os.getenv("CLOUDPSS_TOKEN")
-    if not api_token:
-        raise RuntimeError("CLOUDPSS_TOKEN 未设置")
-    cloudpss.setToken(api_token)
-    api_url = os.getenv("CLOUDPSS_API_URL", "https://cloudpss.net/")
-    os.environ["CLOUDPSS_API_URL"] = api_url
-
-    # 2) 获取模型
+    # 1) 获取模型（鉴权与平台地址已在启动时设置）
     model = cloudpss.Model.fetch(rid)
 
-    # 3) 运行潮流
+    # 2) 运行潮流
     config = model.configs[0]
     job = model.jobs[0]
     runner = model.run(job, config)
 
+    # 轮询间隔：有新日志时保持 0.1 s，空闲时指数退避到 2 s，减少长任务的无效请求
     logs = []
+    delay = 0.1
     while not runner.status():
-        for log in runner.result.getLogs():
+        new_logs = runner.result.getLogs()  # SDK 内部记录已读位置，只返回新日志
+        for log in new_logs:
             d = log.get("data", {})
             logs.append({"level": d.get("level", "info"), "content": d.get("content", "")})
-        time.sleep(0.3)
+        delay = 0.1 if new_logs else min(delay * 1.5, 2.0)
+        time.sleep(delay)
 
-    # 4) 结果
+    # 3) 结果
     buses_raw = runner.result.getBuses()
     branches_raw = runner.result.getBranches()
-    buses = convert_and_alias(buses_raw)
-    branches = convert_and_alias(branches_raw)
+    buses = tables_to_aliased(buses_raw)
+    branches = tables_to_aliased(branches_raw)
     return logs, buses, branches
 
+# ---------- 潮流结果缓存：按 rid 缓存，过期或 force=1 时重新计算 ----------
+PF_CACHE_TTL = 300       # 秒
+PF_CACHE_MAXSIZE = 32
+_pf_cache = OrderedDict()  # rid -> (写入时刻, (logs, buses, branches))，按最近使用排序
+_pf_cache_lock = threading.Lock()
+
+def run_pf_cached(rid: str, force: bool = False):
+    """带缓存的 run_pf_and_get_tables；返回值被多个请求共享，调用方不要修改。"""
+    if not force:
+        with _pf_cache_lock:
+            hit = _pf_cache.get(rid)
+            if hit is not None and time.monotonic() - hit[0] < PF_CACHE_TTL:
+                _pf_cache.move_to_end(rid)
+                return hit[1]
+
+    result = run_pf_and_get_tables(rid)
+    with _pf_cache_lock:
+        _pf_cache[rid] = (time.monotonic(), result)
+        _pf_cache.move_to_end(rid)
+        while len(_pf_cache) > PF_CACHE_MAXSIZE:
+            _pf_cache.popitem(last=False)
+    return result
+
+def iter_csv(headers, rows, chunk_rows: int = 500):
+    """逐块生成 CSV（bytes），边写边发，不在内存中拼出整个文件；开头带 BOM 便于 Excel 识别 UTF-8。"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(headers)
+    yield b"\xef\xbb\xbf" + buf.getvalue().encode("utf-8")
+    for start in range(0, len(rows), chunk_rows):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([r.get(h, "") for h in headers] for r in rows[start:start + chunk_rows])
+        yield buf.getvalue().encode("utf-8")
+
 @app.route("/")
 def index():
     rid = request.args.get("rid", "model/CloudPSS/IEEE3")
@@ -102,8 +136,9 @@ def index():
 @app.route("/api/powerflow")
 def api_powerflow():
     rid = request.args.get("rid", "model/CloudPSS/IEEE3")
+    force = request.args.get("force") == "1"
     try:
-        logs, buses, branches = run_pf_and_get_tables(rid)
+        logs, buses, branches = run_pf_cached(rid, force=force)
         return jsonify({"rid": rid, "logs": logs, "buses": buses, "branches": branches})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -111,29 +146,22 @@ def api_powerflow():
 @app.route("/api/export/csv")
 def export_csv():
     """
-    下载 CSV：/api/export/csv?rid=...&table=buses|branches
-    每次下载会按指定 rid 重新计算一次（简单、无状态；如需避免重复计算，可做缓存）。
+    下载 CSV：/api/export/csv?rid=...&table=buses|branches[&force=1]
+    优先复用该 rid 最近一次的计算结果（见 run_pf_cached）；force=1 时强制重新计算。
     """
     rid = request.args.get("rid", "model/CloudPSS/IEEE3")
     table = request.args.get("table", "buses").lower()
+    force = request.args.get("force") == "1"
     if table not in ("buses", "branches"):
         return jsonify({"error": "table 参数必须是 buses 或 branches"}), 400
 
     try:
-        _, buses, branches = run_pf_and_get_tables(rid)
+        _, buses, branches = run_pf_cached(rid, force=force)
         result = buses if table == "buses" else branches
 
-        # 写入 CSV
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=result["headers"])
-        writer.writeheader()
-        for r in result["rows"]:
-            writer.writerow({h: r.get(h, "") for h in result["headers"]})
-
-        csv_bytes = output.getvalue().encode("utf-8-sig")  # 带 BOM 便于 Excel 识别 UTF-8
         filename = f"{rid.split('/')[-1]}_{table}.csv"
         return Response(
-            csv_bytes,
+            iter_csv(result["headers"], result["rows"]),
             mimetype="text/csv; charset=utf-8",
             headers={"Content-Disposition": f'attachment; filename="{filename}"'}
         )
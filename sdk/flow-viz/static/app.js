@@ -10,7 +10,8 @@ async function runPowerFlow(rid) {
   dlBranches.disabled = true;
 
   try {
-    const resp = await fetch('/api/powerflow?rid=' + encodeURIComponent(rid));
+    // 手动运行总是重新计算；随后的 CSV 下载复用服务端缓存的这次结果
+    const resp = await fetch('/api/powerflow?force=1&rid=' + encodeURIComponent(rid));
     if (!resp.ok) {
       status.textContent = '❌ 请求失败：' + resp.status + ' ' + resp.statusText;
       return;
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+helloworld 示例的公共骨架：设置 token → 获取算例 → 运行计算方案 → 轮询直到结束。
+
+test.py / test2.py / test_gpt5.py 都基于这里的函数；也可以直接在同一进程里批量运行多个算例
+（一个长驻进程，在 PyPy 下只需预热一次 JIT）：
+  python _common.py model/CloudPSS/IEEE3 model/wengod/T_3_Gen_9_Bus
+"""
+import os
+import sys
+import time
+import cloudpss
+
+
+def setup_token():
+    """从环境变量读取 token，并设置平台地址。"""
+    api_token = os.getenv("CLOUDPSS_TOKEN")
+    if not api_token:
+        raise RuntimeError("❌ 未获取到 CLOUDPSS_TOKEN，请先在环境变量中设置。")
+    cloudpss.setToken(api_token)
+    os.environ['CLOUDPSS_API_URL'] = 'https://cloudpss.net/'  # 公网地址；如用专网，请改为专网地址
+
+
+def poll(runner):
+    """等待计算结束并打印运行日志：有新日志时快速轮询，空闲时指数退避（上限 2 s）。"""
+    delay = 0.1
+    while not runner.status():
+        logs = runner.result.getLogs()  # 只返回上次调用之后的新日志
+        for log in logs:
+            print(log)
+        delay = 0.1 if logs else min(delay * 1.5, 2.0)
+        time.sleep(delay)
+    print('end')  # 运行结束
+
+
+def run_model(model, job_index=0):
+    """用 model 的第一个参数方案运行 jobs[job_index]（jobs[0] 一般为潮流计算方案），返回 runner。"""
+    config = model.configs[0]
+    job = model.jobs[job_index]
+    print(f"运行 {model.rid} 的计算方案 {job.get('name')}")
+    runner = model.run(job, config)
+    poll(runner)
+    return runner
+
+
+def run_example(rid, job_index=0, render=None):
+    """获取 rid 对应的算例并运行；render(result) 可选，用于展示结果。返回 runner.result。"""
+    setup_token()
+    model = cloudpss.Model.fetch(rid)
+    result = run_model(model, job_index).result
+    if render is not None:
+        render(result)
+    return result
+
+
+if __name__ == '__main__':
+    for rid in sys.argv[1:] or ['model/CloudPSS/IEEE3']:
+        run_example(rid)
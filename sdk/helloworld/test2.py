@@ -1,47 +1,23 @@
-import sys, os
-import cloudpss
-import json
-import time
+from _common import run_example
 
-if __name__ == '__main__':
-    # 填写 token
-    api_token = os.getenv("CLOUDPSS_TOKEN")
-    cloudpss.setToken(api_token)
-
-    # 设置访问的地址
-    os.environ['CLOUDPSS_API_URL'] = 'https://cloudpss.net/'
-
-    # 选择算例，获取指定算例 rid 的项目
-    # model = cloudpss.Model.fetch('model/CloudPSS/IEEE3')
-    model = cloudpss.Model.fetch('model/wengod/T_3_Gen_9_Bus')
-
-    print(model.rid)
-    print([(j.get('name'), j.get('@type', j.get('type'))) for j in model.jobs])  # 看所有job
-    # 选择参数方案，若未设置，则默认用 model 的第一个 config（参数方案）
-    config = model.configs[0]
-
-    # 选择计算方案，若未设置，则默认用 model 的第一个 job（潮流计算方案），此处选择 jobs[1]，为电磁暂态仿真任务
-    job = model.jobs[1]
 
-    # 启动计算任务
-    runner = model.run(job, config)
-    while not runner.status():
-        logs = runner.result.getLogs()  # 获得运行日志
-        for log in logs:
-            print(log)  # 输出日志
-        time.sleep(1)
-    print('end')  # 运行结束
-
-    # 获取全部输出通道
-    plots = runner.result.getPlots()
-
-    # 使用 plotly 绘制曲线
+def show_plots(result):
+    # 获取全部输出通道，使用 plotly 绘制曲线：每个输出分组一行子图，整体只渲染一次
     import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
 
+    plots = result.getPlots()
+    if not plots:
+        return
+    fig = make_subplots(rows=len(plots), cols=1)
     for i in range(len(plots)):
-        fig = go.Figure()
-        channels = runner.result.getPlotChannelNames(i)
-        for val in channels:
-            channel = runner.result.getPlotChannelData(i, val)
-            fig.add_trace(go.Scatter(channel))
-        fig.show()
\ No newline at end of file
+        traces = [go.Scatter(result.getPlotChannelData(i, val)) for val in result.getPlotChannelNames(i)]
+        fig.add_traces(traces, rows=i + 1, cols=1)
+    fig.update_layout(height=350 * len(plots))
+    fig.show()
+
+
+if __name__ == '__main__':
+    # 选择算例；jobs[1] 为电磁暂态仿真任务
+    # run_example('model/CloudPSS/IEEE3', job_index=1, render=show_plots)
+    run_example('model/wengod/T_3_Gen_9_Bus', job_index=1, render=show_plots)
@@ -15,17 +15,32 @@ CloudPSS SDK 官方推荐实践（含保存到个人空间）：
 """
 
 import os
-import time
 import json
+import numpy as np
 import cloudpss
 
+from _common import setup_token, run_model
+
+def _to_float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def format_3f(values):
+    """整列统一保留 3 位小数；无法转成数值的单元格（如字符串）原样显示。"""
+    raw = np.asarray(values, dtype=object)
+    try:
+        num = raw.astype(np.float64)  # 常见情况：整列都是数值，一次转换
+    except (TypeError, ValueError):
+        num = np.array([_to_float(x) for x in raw], dtype=np.float64)
+    return np.where(np.isnan(num), raw.astype(str), np.char.mod("%.3f", num))
+
+
 def main():
-    # ===== 0. 设置平台地址 + Token =====
-    os.environ["CLOUDPSS_API_URL"] = "https://cloudpss.net/"  # 公网地址；如用专网，请改为专网地址
-    api_token = os.getenv("CLOUDPSS_TOKEN")                   # 从环境变量读取 Token（推荐做法）
-    if not api_token:
-        raise RuntimeError("❌ 未获取到 CLOUDPSS_TOKEN，请先在环境变量中设置。")
-    cloudpss.setToken(api_token)
+    # ===== 0. 设置平台地址 + Token（从环境变量读取 Token，推荐做法）=====
+    setup_token()
 
     account = os.getenv("CLOUDPSS_ACCOUNT")                   # 你的 CloudPSS 账号名，用于个人空间 rid
     if not account:
@@ -68,17 +83,9 @@ def main():
     cloudpss.ModelTopology.dump(model_topology, file_path, indent=2)
     print(f"✅ 已保存拓扑文件：{file_path}")
 
-    # ===== 5. 启动潮流计算 =====
+    # ===== 5. 启动潮流计算（等待结束期间打印运行日志）=====
     # 约定：jobs[0] 一般为潮流计算方案（若你的项目结构不同，请按需调整索引）
-    config = model.configs[0]
-    job    = model.jobs[0]
-    runner = model.run(job, config)
-
-    # 监听运行状态，打印运行日志（可选）
-    while not runner.status():
-        for log in runner.result.getLogs():
-            print(log)
-        time.sleep(0.5)
+    runner = run_model(model, job_index=0)
     print("✅ 潮流计算结束")
 
     # ===== 6. 获取并“可读化”打印结果 =====
@@ -110,19 +117,11 @@ def main():
     branch_columns = branches[0]["data"]["columns"]
     # 期望顺序（常见）：[Branch, From bus, Pij, Qij, To bus, Pji, Qji, Ploss, Qloss]
     if len(branch_columns) >= 5:
-        num_rows = len(branch_columns[0]["data"])
-        for i in range(num_rows):
-            from_bus = branch_columns[1]["data"][i]  # 起始节点 Key
-            to_bus   = branch_columns[4]["data"][i]  # 终止节点 Key
-            pij      = branch_columns[2]["data"][i]  # 有功功率 MW（i->j）
-            qij      = branch_columns[3]["data"][i]  # 无功功率 MVar（i->j）
-            # 统一保留 3 位小数显示（有些数据可能是字符串，先转 float 失败就原样显示）
-            try:
-                pij_disp = f"{float(pij):.3f}"
-                qij_disp = f"{float(qij):.3f}"
-            except Exception:
-                pij_disp = str(pij)
-                qij_disp = str(qij)
+        from_col = branch_columns[1]["data"]              # 起始节点 Key
+        to_col   = branch_columns[4]["data"]              # 终止节点 Key
+        pij_col  = format_3f(branch_columns[2]["data"])   # 有功功率 MW（i->j）
+        qij_col  = format_3f(branch_columns[3]["data"])   # 无功功率 MVar（i->j）
+        for from_bus, to_bus, pij_disp, qij_disp in zip(from_col, to_col, pij_col, qij_col):
             print(f"支路 {from_bus} → {to_bus}: Pij={pij_disp} MW, Qij={qij_disp} MVar")
     else:
         print(json.dumps(branches, ensure_ascii=False, indent=2))
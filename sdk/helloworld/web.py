@@ -1,33 +1,58 @@
 # -*- coding: utf-8 -*-
 import os
+import io
 import time
 import re
-from flask import Flask, jsonify, request, render_template_string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from flask import Flask, jsonify, request, Response
+from flask.json.provider import JSONProvider
+import numpy as np
 import cloudpss
 
-# ---------------- 工具函数：表结构转行 ----------------
-def table_to_rows(table_obj):
+try:  # orjson 为 C 实现，序列化大结果表比标准库 json 快得多；未安装时用 Flask 默认实现
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # 可选：以 Arrow IPC 列式格式返回结果表
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:  # 可选：对 JSON/HTML 响应做 Brotli/gzip 压缩（结果表重复度高，压缩比大）
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# ---------------- 鉴权 + 平台地址：启动时读取并设置一次 ----------------
+API_TOKEN = os.getenv("CLOUDPSS_TOKEN")
+if API_TOKEN:
+    cloudpss.setToken(API_TOKEN)
+os.environ.setdefault("CLOUDPSS_API_URL", "https://cloudpss.net/")
+
+# ---------------- 工具函数：取出表的各列 ----------------
+def table_columns(table_obj):
     """
     CloudPSS 的表是按列存储：table_obj["data"]["columns"] = [{name,type,data}, ...]
-    这里把它转成：rows = [{col_name: cell_value, ...}, ...]
+    返回 (列名列表, 各列数据)；行数以第一列为准，短列补 None、长列截断，保证各列等长。
     """
     columns = table_obj["data"]["columns"]
     headers = [c["name"] for c in columns]
     n = len(columns[0]["data"]) if columns else 0
-    rows = []
-    for i in range(n):
-        row = {}
-        for h, c in zip(headers, columns):
-            vals = c.get("data", [])
-            row[h] = vals[i] if i < len(vals) else None
-        rows.append(row)
-    return headers, rows
+    data_cols = [c.get("data", [])[:n] for c in columns]
+    padded = [d + [None] * (n - len(d)) for d in data_cols]
+    return headers, padded
 
 # HTML 标签清洗（列名里常见 <i>V</i><sub>m</sub>/pu 这类）
 _tag_re = re.compile(r"<[^>]+>")
+@lru_cache(maxsize=512)  # 纯函数，列名集合小且固定：每个列名只跑一次正则
 def clean_label(label: str) -> str:
     if not isinstance(label, str):
         return label
+    if "<" not in label and "_" not in label:  # 无标签、无下划线（如 "From bus"）：无需清洗
+        return label
     return _tag_re.sub("", label).replace("_", "")
 
 # 列名别名（更友好显示用；匹配原始列名，显示用别名）
@@ -51,8 +76,83 @@ ALIASES = {
     "<i>Q</i><sub>loss</sub> / MVar": "Qloss(MVar)",
 }
 
+# 原始列名 → 显示列名 的解析结果缓存：导入时即预置全部已知别名，
+# 已知列名只需一次字典查找；未知列名首次出现时清洗一次并记入缓存
+_ALIAS_CACHE = dict(ALIASES)
+def resolve(h):
+    alias = _ALIAS_CACHE.get(h)
+    if alias is None:
+        alias = _ALIAS_CACHE[h] = clean_label(h)
+    return alias
+
+# ---------------- Arrow 列式输出（可选） ----------------
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+def _arrow_array(data):
+    try:
+        return pa.array(data)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 混合类型的列（如数值中夹杂空字符串）按字符串输出
+        return pa.array([None if v is None else str(v) for v in data], type=pa.string())
+
+def _write_arrow_stream(sink, name, names, cols):
+    """向 sink 写一段完整的 Arrow IPC 流（一个 record batch），表名记在 schema 元数据 "table" 中。"""
+    batch = pa.record_batch([_arrow_array(c) for c in cols], names=names)
+    batch = batch.replace_schema_metadata({"table": name})
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+def result_to_arrow(logs, buses_raw, branches_raw, checks):
+    """
+    把一次潮流计算的全部结果编码为首尾相接的 4 段 Arrow IPC 流（bytes），依次为
+    buses、branches、checks、logs，表名见各段 schema 元数据 "table"。
+    CloudPSS 表直接按列编码，不做按行转置；列名使用别名。
+    读取：Python 对同一个 pa.BufferReader 依次调用 pa.ipc.open_stream；
+          JS（apache-arrow）用 RecordBatchReader.readAll(bytes) 逐段读取。
+    """
+    sink = io.BytesIO()
+    for name, table_list in (("buses", buses_raw), ("branches", branches_raw)):
+        headers, cols = table_columns(table_list[0]) if table_list else ([], [])
+        _write_arrow_stream(sink, name, [resolve(h) for h in headers], cols)
+    _write_arrow_stream(sink, "checks", ["branch", "P_check"],
+                        [[c["branch"] for c in checks], [c["P_check"] for c in checks]])
+    _write_arrow_stream(sink, "logs", ["level", "content"],
+                        [[l["level"] for l in logs], [l["content"] for l in logs]])
+    return sink.getvalue()
+
 # ---------------- Flask ----------------
+class ORJSONProvider(JSONProvider):
+    """基于 orjson 的 JSON 序列化；jsonify() 会自动使用，调用处无需改动。
+
+    compact / sort_keys 与 Flask 默认 provider 的同名属性含义一致。
+    """
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+# 响应不缩进、不排序键：省去排序比较与缩进换行，输出更小
+app.json.compact = True
+app.json.sort_keys = False
+
+# 响应压缩：按客户端 Accept-Encoding 优先 br、其次 gzip；小于 1 KB 的响应不压缩。
+# 默认只压缩 text/html、application/json 等类型，SSE（text/event-stream）与 Arrow 流不受影响
+if Compress is not None:
+    app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    app.config["COMPRESS_MIN_SIZE"] = 1024
+    Compress(app)
 
 # 简单首页模板（直接内嵌，下面有完整 HTML）
 INDEX_HTML = """<!doctype html>
@@ -86,22 +186,31 @@ INDEX_HTML = """<!doctype html>
   <div class="scroll-x"><table id="branches" role="grid"></table></div>
 
 <script>
-async function runPowerFlow(rid) {
+function runPowerFlow(rid) {
   const status = document.getElementById('status');
   status.textContent = '⏳ 提交任务中...';
-  const resp = await fetch('/api/powerflow?rid=' + encodeURIComponent(rid));
-  if (!resp.ok) {
-    status.textContent = '❌ 请求失败：' + resp.status + ' ' + resp.statusText;
-    return;
-  }
-  const data = await resp.json();
-  status.textContent = data.logs && data.logs.length
-    ? data.logs.map(l => '[' + l.level + '] ' + l.content).join('\\n')
-    : '✅ 任务完成。';
-
-  // 渲染表格
-  renderTable('buses', data.buses.headers, data.buses.rows);
-  renderTable('branches', data.branches.headers, data.branches.rows);
+  // 通过 SSE 接收：日志边算边显示，结束时收到完整结果
+  const lines = [];
+  const es = new EventSource('/api/powerflow/stream?rid=' + encodeURIComponent(rid));
+  es.addEventListener('log', (e) => {
+    const l = JSON.parse(e.data);
+    lines.push('[' + l.level + '] ' + l.content);
+    status.textContent = lines.join('\\n');
+  });
+  es.addEventListener('result', (e) => {
+    es.close();
+    const data = JSON.parse(e.data);
+    if (!lines.length) status.textContent = '✅ 任务完成。';
+
+    // 渲染表格
+    renderTable('buses', data.buses.headers, data.buses.rows);
+    renderTable('branches', data.branches.headers, data.branches.rows);
+  });
+  // 服务端的 error 事件带 data；连接失败时浏览器触发的 error 事件没有 data
+  es.addEventListener('error', (e) => {
+    es.close();
+    status.textContent = '❌ ' + (e.data ? JSON.parse(e.data).error : '请求失败');
+  });
 }
 
 function renderTable(id, headers, rows) {
@@ -109,7 +218,7 @@ function renderTable(id, headers, rows) {
   if (!headers || !rows) { table.innerHTML = '<tbody><tr><td>无数据</td></tr></tbody>'; return; }
   let thead = '<thead><tr>' + headers.map(h => '<th>' + h + '</th>').join('') + '</tr></thead>';
   let tbody = '<tbody>' + rows.map(r => {
-    return '<tr>' + headers.map(h => '<td>' + (r[h] ?? '') + '</td>').join('') + '</tr>';
+    return '<tr>' + r.map(v => '<td>' + (v ?? '') + '</td>').join('') + '</tr>';
   }).join('') + '</tbody>';
   table.innerHTML = thead + tbody;
 }
@@ -126,96 +235,188 @@ runPowerFlow('{{ rid }}');
 </body>
 </html>"""
 
+# 模板在启动时编译一次；请求中只做渲染（render_template_string 每次都会重新解析编译）
+_INDEX_TMPL = app.jinja_env.from_string(INDEX_HTML)
+
+# ---------------- 潮流计算 ----------------
+# 模型缓存：按 rid 缓存 Model.fetch 的结果，过期后重新获取（算例很少在两次运行之间改动）
+MODEL_CACHE_TTL = 300     # 秒
+MODEL_CACHE_MAXSIZE = 64
+_model_cache = OrderedDict()  # rid -> (写入时刻, model)，按最近使用排序
+_model_cache_lock = threading.Lock()
+
+def fetch_model(rid):
+    """带缓存的 cloudpss.Model.fetch；返回的 model 被多个请求共享，调用方不要修改。"""
+    with _model_cache_lock:
+        hit = _model_cache.get(rid)
+        if hit is not None and time.monotonic() - hit[0] < MODEL_CACHE_TTL:
+            _model_cache.move_to_end(rid)
+            return hit[1]
+
+    model = cloudpss.Model.fetch(rid)
+    with _model_cache_lock:
+        _model_cache[rid] = (time.monotonic(), model)
+        _model_cache.move_to_end(rid)
+        while len(_model_cache) > MODEL_CACHE_MAXSIZE:
+            _model_cache.popitem(last=False)
+    return model
+
+def start_powerflow(rid):
+    """获取模型（带缓存）并启动潮流计算，返回 runner。"""
+    model = fetch_model(rid)
+    config = model.configs[0]
+    job = model.jobs[0]  # 默认第一个为潮流计算方案
+    return model.run(job, config)
+
+def drain_logs(runner):
+    """取出 runner 的新日志（SDK 内部记录已读位置，每条日志只返回一次）。"""
+    # log 结构：{"type":"log","verb":"create","version":1,"data":{"level":"info","content":"..." }}
+    return [{"level": d.get("level", "info"), "content": d.get("content", "")}
+            for d in (log.get("data", {}) for log in runner.result.getLogs())]
+
+# 转换为“按行可读”；并做列名别名/清洗
+# 输出 {"headers": [...], "rows": [[...], ...]}：每行是与 headers 同序的数组，不重复携带列名
+def convert_and_alias(table_list):
+    if not table_list:
+        return {"headers": [], "rows": []}
+    headers, cols = table_columns(table_list[0])
+
+    # 别名映射后的新表头（保序）
+    alias_headers = [resolve(h) for h in headers]
+
+    # 按列转置为行（元组序列化为 JSON 数组）
+    rows = list(zip(*cols))
+    return {"headers": alias_headers, "rows": rows}
+
+def safe_float(x):
+    try:
+        return float(x)
+    except Exception:
+        return None
+
+def as_float_array(values):
+    """整列转为 float64 数组；无法转换的单元格记为 NaN（通常整列都是数值，一次转换即可）。"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([safe_float(x) for x in values], dtype=np.float64)
+
+def branch_checks(branches_raw):
+    """
+    （可选）做个简单一致性校验：Ploss≈Pij+Pji、Qloss≈Qij+Qji
+    不阻断，只返回到前端可视化时用；返回 [{"branch", "P_check"}, ...]
+    """
+    if not branches_raw:
+        return []
+    pij_k, pji_k, pl_k, from_k, to_k = "Pij(MW)", "Pji(MW)", "Ploss(MW)", "From bus", "To bus"
+    headers, cols = table_columns(branches_raw[0])
+    col = dict(zip((resolve(h) for h in headers), cols))
+    if not {pij_k, pji_k, pl_k} <= col.keys():
+        return []
+    # 直接按原始列整列计算；任一值无法转为数值时为 NaN，比较结果为 False
+    pij = as_float_array(col[pij_k])
+    pji = as_float_array(col[pji_k])
+    pl  = as_float_array(col[pl_k])
+    ok_p = np.abs((pij + pji) - pl) < 1e-3
+    missing = ["?"] * len(ok_p)
+    return [{"branch": f"{f}→{t}", "P_check": ok}
+            for f, t, ok in zip(col.get(from_k, missing), col.get(to_k, missing), ok_p.tolist())]
+
+def build_result(rid, logs, buses_raw, branches_raw):
+    """组装返回前端的结果：别名化后的 buses / branches 表，以及支路功率一致性校验。"""
+    return {
+        "rid": rid,
+        "logs": logs,
+        "buses": convert_and_alias(buses_raw),
+        "branches": convert_and_alias(branches_raw),
+        "checks": branch_checks(branches_raw)
+    }
+
 @app.route("/")
 def index():
     # 默认演示 RID，可在页面更改
     rid = request.args.get("rid", "model/CloudPSS/IEEE3")
-    return render_template_string(INDEX_HTML, rid=rid)
+    return _INDEX_TMPL.render(rid=rid)
 
 @app.route("/api/powerflow")
 def api_powerflow():
-    # --- 1) 鉴权 + 平台地址 ---
-    api_token = os.getenv("CLOUDPSS_TOKEN")
-    if not api_token:
+    # --- 1) 鉴权（token 已在启动时设置） ---
+    if not API_TOKEN:
         return jsonify({"error": "CLOUDPSS_TOKEN 未设置"}), 500
-    cloudpss.setToken(api_token)
-
-    api_url = os.getenv("CLOUDPSS_API_URL", "https://cloudpss.net/")
-    os.environ["CLOUDPSS_API_URL"] = api_url
 
-    # --- 2) 读取 RID 并获取模型 ---
+    # --- 2) 读取 RID，获取模型并运行潮流 ---
     rid = request.args.get("rid", "model/CloudPSS/IEEE3")
-    model = cloudpss.Model.fetch(rid)
-
-    # --- 3) 选择方案 & 运行潮流 ---
-    config = model.configs[0]
-    job = model.jobs[0]  # 默认第一个为潮流计算方案
-    runner = model.run(job, config)
+    runner = start_powerflow(rid)
 
+    # 轮询：有新日志时 50 ms，空闲时指数退避（上限 1 s）
     logs = []
+    delay = 0.05
     while not runner.status():
-        for log in runner.result.getLogs():
-            # log 结构：{"type":"log","verb":"create","version":1,"data":{"level":"info","content":"..." }}
-            d = log.get("data", {})
-            level = d.get("level", "info")
-            content = d.get("content", "")
-            logs.append({"level": level, "content": content})
-        time.sleep(0.3)
-
-    # --- 4) 读取结果（原始表） ---
+        new_logs = drain_logs(runner)
+        logs.extend(new_logs)
+        delay = 0.05 if new_logs else min(delay * 1.5, 1.0)
+        time.sleep(delay)
+    logs.extend(drain_logs(runner))  # 结束前最后一批日志
+
+    # --- 3) 读取结果（原始表） ---
     buses_raw = runner.result.getBuses()      # list[table]
     branches_raw = runner.result.getBranches()
 
-    # --- 5) 转换为“按行可读”；并做列名别名/清洗 ---
-    def convert_and_alias(table_list):
-        if not table_list:
-            return {"headers": [], "rows": []}
-        headers, rows = table_to_rows(table_list[0])
-
-        # 别名映射后的新表头（保序）
-        alias_headers = []
-        for h in headers:
-            alias_headers.append(ALIASES.get(h, clean_label(h)))
-
-        # 行字段用别名键
-        aliased_rows = []
-        for r in rows:
-            new_r = {}
-            for h, ah in zip(headers, alias_headers):
-                new_r[ah] = r.get(h, "")
-            aliased_rows.append(new_r)
-
-        return {"headers": alias_headers, "rows": aliased_rows}
-
-    buses = convert_and_alias(buses_raw)
-    branches = convert_and_alias(branches_raw)
-
-    # （可选）做个简单一致性校验：Ploss≈Pij+Pji、Qloss≈Qij+Qji
-    # 不阻断，只返回到前端可视化时用
-    def safe_float(x):
+    # 客户端 Accept 声明接受 Arrow 时，一次返回全部结果（buses/branches/checks/logs）的 Arrow IPC 流，
+    # 格式见 result_to_arrow；不必为每张表各跑一次潮流
+    if pa is not None and ARROW_MIMETYPE in request.headers.get("Accept", ""):
+        checks = branch_checks(branches_raw)
+        return Response(result_to_arrow(logs, buses_raw, branches_raw, checks), mimetype=ARROW_MIMETYPE)
+
+    return jsonify(build_result(rid, logs, buses_raw, branches_raw))
+
+@app.route("/api/powerflow/stream")
+def api_powerflow_stream():
+    """
+    以 Server-Sent Events 推送潮流计算过程，日志到达即发送：
+      event: log     单条运行日志 {"level", "content"}
+      event: result  计算结束后的完整结果（与 /api/powerflow 的 JSON 相同）
+      event: error   出错信息 {"error"}
+    """
+    if not API_TOKEN:
+        return jsonify({"error": "CLOUDPSS_TOKEN 未设置"}), 500
+
+    rid = request.args.get("rid", "model/CloudPSS/IEEE3")
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+    def generate():
         try:
-            return float(x)
-        except Exception:
-            return None
-
-    checks = []
-    if "Pij(MW)" in branches["headers"] and "Pji(MW)" in branches["headers"] and "Ploss(MW)" in branches["headers"]:
-        for r in branches["rows"]:
-            pij = safe_float(r.get("Pij(MW)"))
-            pji = safe_float(r.get("Pji(MW)"))
-            pl  = safe_float(r.get("Ploss(MW)"))
-            ok_p = (pij is not None and pji is not None and pl is not None and abs((pij + pji) - pl) < 1e-3)
-            checks.append({"branch": f"{r.get('From bus','?')}→{r.get('To bus','?')}", "P_check": ok_p})
-
-    return jsonify({
-        "rid": rid,
-        "logs": logs,
-        "buses": buses,
-        "branches": branches,
-        "checks": checks
-    })
+            runner = start_powerflow(rid)
+            logs = []
+            while True:
+                done = runner.status()
+                new_logs = drain_logs(runner)
+                for log in new_logs:
+                    yield sse("log", log)
+                logs.extend(new_logs)
+                if done:
+                    break
+                time.sleep(0.05)
+            result = build_result(rid, logs, runner.result.getBuses(), runner.result.getBranches())
+            yield sse("result", result)
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
-    # 运行：python app.py
+    # 运行：python web.py
     # 打开浏览器 http://127.0.0.1:5000
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    # 生产部署也可用 gunicorn（多进程 + 线程）：gunicorn -w 4 -k gthread --threads 8 -b 127.0.0.1:5000 web:app
+    try:  # 优先用 waitress（多线程 WSGI 服务器，pip install waitress）
+        from waitress import serve
+    except ImportError:
+        serve = None
+    if serve is not None:
+        serve(app, host="127.0.0.1", port=5000, threads=8)
+    else:
+        # 回退到 Flask 开发服务器：多线程处理请求，不开 debug/自动重载
+        app.run(host="127.0.0.1", port=5000, threaded=True)